@@ -9,6 +9,7 @@ import pandas as pd
 
 from transformers import AutoTokenizer
 from torch.utils.data import Dataset, DataLoader
+from domadapter.utils.tensor_utils import source_target_collate
 
 install(show_locals=True)
 
@@ -181,13 +182,25 @@ class SADataModuleSourceTarget(pl.LightningDataModule):
             self.test_dataset = test_dataset
 
     def train_dataloader(self):
-        return DataLoader(self.train_dataset, batch_size=self.batch_size, num_workers=16)
+        return self._dataloader(self.train_dataset)
 
     def val_dataloader(self):
-        return DataLoader(self.val_dataset, batch_size=self.batch_size, num_workers=16)
+        return self._dataloader(self.val_dataset)
 
     def test_dataloader(self):
-        return DataLoader(self.test_dataset, batch_size=self.batch_size, num_workers=16)
+        return self._dataloader(self.test_dataset)
+
+    def _dataloader(self, dataset):
+        # pinned memory and persistent workers overlap loading with the training loop
+        return DataLoader(
+            dataset,
+            batch_size=self.batch_size,
+            num_workers=min(8, os.cpu_count() or 1),
+            collate_fn=source_target_collate,
+            pin_memory=True,
+            persistent_workers=True,
+            prefetch_factor=4,
+        )
 
 
 class SourceTargetDataset(Dataset):
@@ -224,21 +237,22 @@ class SourceTargetDataset(Dataset):
         )
         target_input_ids = encoded_input["input_ids"]
         target_attention_mask = encoded_input["attention_mask"]
+        # the vocabulary fits in int32 which halves the memory traffic of the token ids
         if "unlabelled" not in self.target_filename:
             label_target = self.target_df.iloc[index]["label"]
             data_input = {
-                "source_input_ids": torch.tensor(source_input_ids),
+                "source_input_ids": torch.tensor(source_input_ids, dtype=torch.int32),
                 "source_attention_mask": torch.tensor(source_attention_mask),
-                "target_input_ids": torch.tensor(target_input_ids),
+                "target_input_ids": torch.tensor(target_input_ids, dtype=torch.int32),
                 "target_attention_mask": torch.tensor(target_attention_mask),
                 "label_source": torch.tensor(label_source, dtype=torch.long),
                 "label_target": torch.tensor(label_target, dtype=torch.long),
             }
         else:
             data_input = {
-                "source_input_ids": torch.tensor(source_input_ids),
+                "source_input_ids": torch.tensor(source_input_ids, dtype=torch.int32),
                 "source_attention_mask": torch.tensor(source_attention_mask),
-                "target_input_ids": torch.tensor(target_input_ids),
+                "target_input_ids": torch.tensor(target_input_ids, dtype=torch.int32),
                 "target_attention_mask": torch.tensor(target_attention_mask),
                 "label_source": torch.tensor(label_source, dtype=torch.long),
             }
@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from typing import Sequence
 import torch
 
 
@@ -6,3 +7,51 @@ class BaseDivergence(metaclass=ABCMeta):
     @abstractmethod
     def calculate(self, source_sample: torch.Tensor, target_sample: torch.Tensor):
         pass
+
+    def calculate_layerwise(
+        self, source_samples: torch.Tensor, target_samples: torch.Tensor
+    ):
+        """Divergence between source and target samples of several layers
+
+        :param source_samples: torch.Tensor
+            num_layers, batch_size, embedding_dimension
+        :param target_samples: torch.Tensor
+            num_layers, batch_size, embedding_dimension
+
+        :return: torch.Tensor
+            num_layers
+            The divergence of every layer
+        """
+        return torch.stack(
+            [
+                self.calculate(source_sample=source_sample, target_sample=target_sample)
+                for source_sample, target_sample in zip(source_samples, target_samples)
+            ]
+        )
+
+    def calculate_hidden_states(
+        self, hidden_states: Sequence[torch.Tensor], split_point: int
+    ) -> torch.Tensor:
+        """Divergence between source and target hidden states summed over the layers
+
+        Every layer is mean pooled over the sequence and the layers are stacked so that
+        the divergence of all the layers is computed by a single ``calculate_layerwise``
+        call and summed with a single node in the autograd graph.
+
+        :param hidden_states: Sequence[torch.Tensor]
+            num_layers * [2 * batch_size, seq_length, hidden_dim]
+            The source examples followed by the target examples
+        :param split_point: int
+            Index where the target examples start
+        :return: torch.Tensor
+            The summed divergence
+        """
+        # features shape: [num_layers, 2 * batch_size, hidden_dim]
+        features = torch.stack(
+            [torch.mean(hidden_state, dim=1) for hidden_state in hidden_states], dim=0
+        )
+        # slicing returns views, no copy is made
+        return self.calculate_layerwise(
+            source_samples=features[:, :split_point],
+            target_samples=features[:, split_point:],
+        ).sum()
@@ -1,8 +1,9 @@
 import torch
 from domadapter.divergences.base_divergence import BaseDivergence
+from domadapter.utils.tensor_utils import jit_compile
 
 
-def cmd(x1, x2, n_moments=5):
+def cmd(x1: torch.Tensor, x2: torch.Tensor, n_moments: int = 5):
     """Central Moment Discrepancy
     The code is taken from
     https://github.com/wzell/mann/blob/master/models/central_moment_discrepancy.py
@@ -13,43 +14,68 @@ def cmd(x1, x2, n_moments=5):
     2017.
     - Zellinger, Werner, et al. "Central moment discrepancy (CMD) for
     domain-invariant representation learning.", ICLR, 2017.
+
+    The samples are of shape [..., batch_size, embedding_dimension]; any
+    leading dimensions (e.g. layers) are computed in the same kernels and
+    kept in the output.
     """
-    mx1 = torch.mean(x1, 0)
-    mx2 = torch.mean(x2, 0)
-    sx1 = x1 - mx1
-    sx2 = x2 - mx2
+    mx1 = torch.mean(x1, -2, keepdim=True)
+    mx2 = torch.mean(x2, -2, keepdim=True)
+    # centralized source and target samples together
+    # shape [2, ..., batch_size, embedding_dimension]
+    sx = torch.stack([x1 - mx1, x2 - mx2], dim=0)
     dm = l2diff(mx1, mx2)
-    scms = dm
-    for i in range(n_moments - 1):
-        # moment diff of centralized samples
-        scms += moment_diff(sx1, sx2, i + 2)
+    scms = dm + moment_diff(sx, n_moments).sum(0)
     return scms
 
 
-def l2diff(x1, x2):
+def l2diff(x1: torch.Tensor, x2: torch.Tensor):
     """
     standard euclidean norm
     """
     power = torch.pow(x1 - x2, 2)
-    summed = torch.sum(power)
+    summed = torch.sum(power, dim=(-2, -1))
     sqrt = summed ** (0.5)
     return sqrt
 
 
-def moment_diff(sx1, sx2, k):
+def moment_diff(sx: torch.Tensor, n_moments: int):
     """
-    difference between moments
+    difference between the moments 2 to n_moments
+    of the stacked centralized source and target samples
     """
-    ss1 = torch.mean(torch.pow(sx1, k), 0)
-    ss2 = torch.mean(torch.pow(sx2, k), 0)
-    return l2diff(ss1, ss2)
+    # higher powers by repeated multiplication, all the moments
+    # are then computed with a single reduction
+    power = sx
+    powers = []
+    for _ in range(n_moments - 1):
+        power = power * sx
+        powers.append(power)
+    # shape [n_moments - 1, 2, ..., 1, embedding_dimension]
+    ss = torch.mean(torch.stack(powers, dim=0), -2, keepdim=True)
+    return l2diff(ss[:, 0], ss[:, 1])
 
 
 class CMD(BaseDivergence):
     def __init__(
         self,
+        compile_cmd: bool = False,
     ):
-        pass
+        """
+
+        :param compile_cmd: bool
+            JIT compile cmd to fuse the moment computations into fewer kernels.
+            The compilation happens on the first call.
+        """
+        self.compile_cmd = compile_cmd
+        self._compiled_cmd = None
+
+    def _cmd(self):
+        if not self.compile_cmd:
+            return cmd
+        if self._compiled_cmd is None:
+            self._compiled_cmd = jit_compile(cmd)
+        return self._compiled_cmd
 
     def calculate(
         self,
@@ -69,9 +95,32 @@ class CMD(BaseDivergence):
         """
         assert source_sample.size() == target_sample.size()
 
-        mmd_measure = cmd(source_sample, target_sample)
+        # higher order central moments overflow/underflow in half precision,
+        # so always compute the discrepancy in fp32 even when training with AMP
+        with torch.cuda.amp.autocast(enabled=False):
+            mmd_measure = self._cmd()(source_sample.float(), target_sample.float())
 
         return mmd_measure
 
+    def calculate_layerwise(
+        self,
+        source_samples: torch.Tensor,
+        target_samples: torch.Tensor,
+    ):
+        """
+
+        :param source_samples: torch.Tensor
+            num_layers, batch_size, embedding_dimension
+        :param target_samples: torch.Tensor
+            num_layers, batch_size, embedding_dimension
+
+        :return: torch.Tensor
+        The divergence between the samples of every layer
+
+        """
+        # cmd reduces over the last two dimensions, so all the layers are
+        # computed together instead of one call per layer
+        return self.calculate(source_samples, target_samples)
+
     def __call__(self, source_sample: torch.Tensor, target_sample: torch.Tensor):
         return self.calculate(source_sample, target_sample)
@@ -121,61 +121,27 @@ class DomainAdapter(pl.LightningModule):
         )
 
     def training_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            [batch["source_input_ids"], batch["target_input_ids"]], dim=0
-        )
-        attention_mask = torch.cat(
-            [batch["source_attention_mask"], batch["target_attention_mask"]], dim=0
-        )
+        # the collate function already concatenated the source and target data
+        input_ids = batch["input_ids"]
+        attention_mask = batch["attention_mask"]
 
         outputs = self(input_ids=input_ids, attention_mask=attention_mask)
 
-        divergence = 0
-        for num in range(len(outputs)):
-            src_feature, trg_feature = torch.split(
-                tensor=outputs[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.criterion.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        split_point = batch["split_point"]
+        divergence = self.criterion.calculate_hidden_states(outputs, split_point)
 
         self.log(name="train/loss", value=divergence)
         return divergence
 
     def validation_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            (batch["source_input_ids"], batch["target_input_ids"]), dim=0
-        )
-        attention_mask = torch.cat(
-            (batch["source_attention_mask"], batch["target_attention_mask"]), dim=0
-        )
+        # the collate function already concatenated the source and target data
+        input_ids = batch["input_ids"]
+        attention_mask = batch["attention_mask"]
 
         outputs = self(input_ids=input_ids, attention_mask=attention_mask)
 
-        divergence = 0
-        for num in range(len(outputs)):
-            src_feature, trg_feature = torch.split(
-                tensor=outputs[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.criterion.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        split_point = batch["split_point"]
+        divergence = self.criterion.calculate_hidden_states(outputs, split_point)
 
         self.log(name="val/divergence", value=divergence)
         return {"loss": divergence}
@@ -4,6 +4,7 @@ import pytorch_lightning as pl
 from typing import Any, Optional, Dict, List, Union
 from transformers import AutoModelWithHeads, AutoConfig, AdapterConfig
 from domadapter.console import console
+from domadapter.utils.tensor_utils import split_source_target
 import torch.nn as nn
 from torch.nn import CrossEntropyLoss
 import torch.optim as optim
@@ -167,7 +168,7 @@ class DomainTaskAdapter(pl.LightningModule):
     def training_step(self, batch, batch_idx):
         """training step of DomainTaskAdapter"""
         # get the input ids and attention mask
-        input_ids, attention_mask = batch["source_input_ids"], batch["source_attention_mask"]
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         # get the logits
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         # get the labels
@@ -185,7 +186,7 @@ class DomainTaskAdapter(pl.LightningModule):
     def validation_step(self, batch, batch_idx):
         """validation step of DomainTaskAdapter"""
         # get the input ids and attention mask for source data
-        input_ids, attention_mask = batch["source_input_ids"], batch["source_attention_mask"]
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_source"]
         source_loss = self.criterion(logits, labels)
@@ -193,7 +194,7 @@ class DomainTaskAdapter(pl.LightningModule):
         source_f1 = self.f1(labels, torch.argmax(self.softmax(logits), dim=1))
 
         # get the input ids and attention mask for target data
-        input_ids, attention_mask = batch["target_input_ids"], batch["target_attention_mask"]
+        _, _, input_ids, attention_mask = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_target"]
         target_loss = self.criterion(logits, labels)
@@ -237,7 +238,7 @@ class DomainTaskAdapter(pl.LightningModule):
     def test_step(self, batch, batch_idx):
         """validation step of DomainTaskAdapter"""
         # get the input ids and attention mask for source data
-        input_ids, attention_mask = batch["source_input_ids"], batch["source_attention_mask"]
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_source"]
         source_loss = self.criterion(logits, labels)
@@ -245,7 +246,7 @@ class DomainTaskAdapter(pl.LightningModule):
         source_f1 = self.f1(labels, torch.argmax(self.softmax(logits), dim=1))
 
         # get the input ids and attention mask for target data
-        input_ids, attention_mask = batch["target_input_ids"], batch["target_attention_mask"]
+        _, _, input_ids, attention_mask = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_target"]
         target_loss = self.criterion(logits, labels)
@@ -152,44 +152,27 @@ class JointDomainTaskAdapter(pl.LightningModule):
         )
 
     def training_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            [batch["source_input_ids"], batch["target_input_ids"]], dim=0
-        )
-        attention_mask = torch.cat(
-            [batch["source_attention_mask"], batch["target_attention_mask"]], dim=0
-        )
+        # the collate function already concatenated the source and target data
+        input_ids = batch["input_ids"]
+        attention_mask = batch["attention_mask"]
         # get the labels
         labels = batch["label_source"]
 
-        start_steps = self.current_epoch * batch["source_input_ids"].shape[0]
-        total_steps = self.hparams["epochs"] * batch["source_input_ids"].shape[0]
+        start_steps = self.current_epoch * batch["split_point"]
+        total_steps = self.hparams["epochs"] * batch["split_point"]
 
         p = float(batch_idx + start_steps) / total_steps
         alpha = 2.0 / (1.0 + np.exp(-10 * p)) - 1
 
         hidden_states, logits = self(input_ids=input_ids, attention_mask=attention_mask)
 
-        divergence = 0
-        for num in range(len(hidden_states)):
-            src_feature, trg_feature = torch.split(
-                tensor=hidden_states[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.divergence.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        split_point = batch["split_point"]
+        divergence = self.divergence.calculate_hidden_states(hidden_states, split_point)
 
         # get the loss
         logits, _ = torch.split(
             tensor=logits,
-            split_size_or_sections=input_ids.shape[0] // 2,
+            split_size_or_sections=split_point,
             dim=0,
         )
         task_loss = self.criterion(logits, labels)
@@ -215,36 +198,19 @@ class JointDomainTaskAdapter(pl.LightningModule):
         self._log_metrics(outputs)
 
     def validation_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            [batch["source_input_ids"], batch["target_input_ids"]], dim=0
-        )
-        attention_mask = torch.cat(
-            [batch["source_attention_mask"], batch["target_attention_mask"]], dim=0
-        )
+        # the collate function already concatenated the source and target data
+        input_ids = batch["input_ids"]
+        attention_mask = batch["attention_mask"]
 
         hidden_states, logits = self(input_ids=input_ids, attention_mask=attention_mask)
 
-        divergence = 0
-        for num in range(len(hidden_states)):
-            src_feature, trg_feature = torch.split(
-                tensor=hidden_states[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.divergence.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        split_point = batch["split_point"]
+        divergence = self.divergence.calculate_hidden_states(hidden_states, split_point)
 
         # get the loss for source
         logits_source, logits_target = torch.split(
             tensor=logits,
-            split_size_or_sections=input_ids.shape[0] // 2,
+            split_size_or_sections=split_point,
             dim=0,
         )
         source_taskclf_loss = self.criterion(logits_source, batch["label_source"])
@@ -283,36 +249,19 @@ class JointDomainTaskAdapter(pl.LightningModule):
         self._log_metrics(outputs)
 
     def test_step(self, batch, batch_idx):
-                # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            [batch["source_input_ids"], batch["target_input_ids"]], dim=0
-        )
-        attention_mask = torch.cat(
-            [batch["source_attention_mask"], batch["target_attention_mask"]], dim=0
-        )
+                # the collate function already concatenated the source and target data
+        input_ids = batch["input_ids"]
+        attention_mask = batch["attention_mask"]
 
         hidden_states, logits = self(input_ids=input_ids, attention_mask=attention_mask)
 
-        divergence = 0
-        for num in range(len(hidden_states)):
-            src_feature, trg_feature = torch.split(
-                tensor=hidden_states[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.divergence.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        split_point = batch["split_point"]
+        divergence = self.divergence.calculate_hidden_states(hidden_states, split_point)
 
         # get the loss for source
         logits_source, logits_target = torch.split(
             tensor=logits,
-            split_size_or_sections=input_ids.shape[0] // 2,
+            split_size_or_sections=split_point,
             dim=0,
         )
         source_taskclf_loss = self.criterion(logits_source, batch["label_source"])
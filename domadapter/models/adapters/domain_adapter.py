@@ -38,9 +38,19 @@ class DomainAdapter(pl.LightningModule):
         self.model.add_adapter(f"domain_adapter_{self.hparams['source_target']}", config=config)
         # activate the adapter
         self.model.train_adapter(f"domain_adapter_{self.hparams['source_target']}")
+
+        # recompute the transformer activations in the backward pass instead of storing them
+        # which allows for larger batch sizes
+        if self.hparams.get("gradient_checkpointing", True):
+            self._enable_gradient_checkpointing()
+
+        # compile the transformer forward (PyTorch >= 2.0). Only the forward is compiled
+        # so that the state dict keys and the adapter methods of the model stay the same
+        if self.hparams.get("compile", False) and hasattr(torch, "compile"):
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead")
         # object to compute the divergence
         if self.hparams["loss"] == 'cmd':
-            self.criterion = CMD()
+            self.criterion = CMD(compile_cmd=self.hparams.get("compile", False))
         elif self.hparams["loss"] == 'coral':
             self.criterion = Coral()
         elif self.hparams["loss"] == 'mkmmd':
@@ -57,6 +67,21 @@ class DomainAdapter(pl.LightningModule):
         self.scheduler_cooldown = self.hparams.get("scheduler_cooldown", 0)
         self.scheduler_eps = self.hparams.get("scheduler_eps", 1e-8)
 
+    def _enable_gradient_checkpointing(self):
+        if hasattr(self.model, "gradient_checkpointing_enable"):
+            self.model.gradient_checkpointing_enable()
+        else:
+            self.model.config.gradient_checkpointing = True
+
+        # the pretrained weights are frozen by train_adapter, so the inputs of the
+        # checkpointed layers would not require grad and the adapters would get no gradients
+        if hasattr(self.model, "enable_input_require_grads"):
+            self.model.enable_input_require_grads()
+        else:
+            self.model.get_input_embeddings().register_forward_hook(
+                lambda module, inputs, output: output.requires_grad_(True)
+            )
+
     def forward(self, input_ids, attention_mask=None):
         """Forward pass of the model"""
         # get the model output
@@ -104,66 +129,36 @@ class DomainAdapter(pl.LightningModule):
         )
 
     def training_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            [batch["source_input_ids"], batch["target_input_ids"]], dim=0
-        )
-        attention_mask = torch.cat(
-            [batch["source_attention_mask"], batch["target_attention_mask"]], dim=0
+        # the collate function already concatenated the source and target data
+        outputs = self(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+        split_point = batch["split_point"]
+
+        divergence = self.criterion.calculate_hidden_states(outputs, split_point)
+
+        # accumulate over the epoch instead of logging (and syncing) every step
+        self.log(
+            name="train/loss",
+            value=divergence,
+            on_step=False,
+            on_epoch=True,
+            sync_dist=False,
+            reduce_fx=torch.mean,
         )
-
-        outputs = self(input_ids=input_ids, attention_mask=attention_mask)
-
-        divergence = 0
-        for num in range(len(outputs)):
-            src_feature, trg_feature = torch.split(
-                tensor=outputs[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.criterion.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
-
-        self.log(name="train/loss", value=divergence)
         return divergence
 
     def validation_step(self, batch, batch_idx):
-        # concat the source and target data and pass it to the model
-        input_ids = torch.cat(
-            (batch["source_input_ids"], batch["target_input_ids"]), dim=0
-        )
-        attention_mask = torch.cat(
-            (batch["source_attention_mask"], batch["target_attention_mask"]), dim=0
-        )
-
-        outputs = self(input_ids=input_ids, attention_mask=attention_mask)
+        # the collate function already concatenated the source and target data
+        outputs = self(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+        split_point = batch["split_point"]
 
-        divergence = 0
-        for num in range(len(outputs)):
-            src_feature, trg_feature = torch.split(
-                tensor=outputs[num],
-                split_size_or_sections=input_ids.shape[0] // 2,
-                dim=0,
-            )
-            # src_feature shape: [batch_size, seq_length, hidden_dim]
-            # trg_feature shape: [batch_size, seq_length, hidden_dim]
-            # change their shape to [batch_size, hidden_dim]
-            src_feature = torch.mean(src_feature, dim=1)
-            trg_feature = torch.mean(trg_feature, dim=1)
-            divergence += self.criterion.calculate(
-                source_sample=src_feature, target_sample=trg_feature
-            )
+        divergence = self.criterion.calculate_hidden_states(outputs, split_point)
 
-        self.log(name="val/divergence", value=divergence)
-        return {"loss": divergence}
-
-    def validation_epoch_end(self, outputs):
-        mean_divergenence = torch.stack([x["loss"] for x in outputs]).mean()
         # this will show the mean div value across epoch
-        self.log(name="val/divergence", value=mean_divergenence)
+        self.log(
+            name="val/divergence",
+            value=divergence,
+            on_step=False,
+            on_epoch=True,
+            reduce_fx=torch.mean,
+        )
+        return {"loss": divergence}
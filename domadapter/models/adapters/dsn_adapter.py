@@ -13,6 +13,7 @@ from collections import defaultdict
 from domadapter.models.modules.dsn_losses import DiffLoss, MSE
 from domadapter.divergences.cmd_divergence import CMD
 from domadapter.models.modules.linear_clf import LinearClassifier
+from domadapter.utils.tensor_utils import split_source_target
 
 import torchmetrics
 
@@ -202,10 +203,7 @@ class DSNAdapter(pl.LightningModule):
     def training_step(self, batch, batch_idx):
         """training step of DSNAdapter"""
         # Classification loss
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
@@ -275,10 +273,7 @@ class DSNAdapter(pl.LightningModule):
 
     def validation_step(self, batch, batch_idx):
         """validation step of DSNAdapter"""
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
@@ -335,10 +330,7 @@ class DSNAdapter(pl.LightningModule):
 
     def test_step(self, batch, batch_idx):
         """test step of DSNAdapter"""
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
@@ -5,6 +5,7 @@ from typing import Any, Optional, Dict, List, Union
 from transformers import AutoModelForSequenceClassification
 from transformers import AutoConfig
 from domadapter.console import console
+from domadapter.utils.tensor_utils import split_source_target
 import torch.nn as nn
 from torch.nn import CrossEntropyLoss
 import torch.optim as optim
@@ -82,10 +83,7 @@ class FT(pl.LightningModule):
     def training_step(self, batch, batch_idx):
         """training step of FT"""
         # get the input ids and attention mask
-        input_ids, attention_mask = (
-            batch["source_input_ids"],
-            batch["source_attention_mask"],
-        )
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         # get the logits
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         # get the labels
@@ -103,10 +101,7 @@ class FT(pl.LightningModule):
     def validation_step(self, batch, batch_idx):
         """validation step of FT"""
         # get the input ids and attention mask for source data
-        input_ids, attention_mask = (
-            batch["source_input_ids"],
-            batch["source_attention_mask"],
-        )
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_source"]
         loss = self.criterion(logits, labels)
@@ -137,10 +132,7 @@ class FT(pl.LightningModule):
     def test_step(self, batch, batch_idx):
         """validation step of FT"""
         # get the input ids and attention mask for source data
-        input_ids, attention_mask = (
-            batch["source_input_ids"],
-            batch["source_attention_mask"],
-        )
+        input_ids, attention_mask, _, _ = split_source_target(batch)
         logits = self(input_ids=input_ids, attention_mask=attention_mask)
         labels = batch["label_source"]
         loss = self.criterion(logits, labels)
@@ -98,25 +98,19 @@ class DANN(pl.LightningModule):
         self.is_dynamic_dann_alpha = self.hparams.get("is_dynamic_dann_alpha", False)
         self.dann_alpha = self.hparams.get("dann_alpha")
 
-    def forward(self, src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask, alpha):
+    def forward(self, inp_ids, attn_mask, alpha):
         """
 
         Parameters
         ----------
-        src_inp_ids: torch.Tensor
-            Size: B * L
+        inp_ids: torch.Tensor
+            Size: 2B * L
+            Source inputs followed by the target inputs
             B = Batch Size
             L - Sequence Length
-        src_attn_mask: torch.Tensor
-            Size: B * L
-            B = Batch Size
-            L - Sequence Length
-        trg_inp_ids: torch.Tensor
-            Size: B * L
-            B = Batch Size
-            L - Sequence Length
-        trg_attn_mask: torch.Tensor
-            Size: B * L
+        attn_mask: torch.Tensor
+            Size: 2B * L
+            Source masks followed by the target masks
             B = Batch Size
             L - Sequence Length
         alpha: float
@@ -126,9 +120,7 @@ class DANN(pl.LightningModule):
 
         """
 
-        bsz = src_inp_ids.size(0)
-        inp_ids = torch.cat([src_inp_ids, trg_inp_ids], dim=0)
-        attn_mask = torch.cat([src_attn_mask, trg_attn_mask], dim=0)
+        bsz = inp_ids.size(0) // 2
 
         outputs = self.feature_extractor(input_ids=inp_ids, attention_mask=attn_mask)
         pooler_outputs = outputs.pooler_output
@@ -158,17 +150,16 @@ class DANN(pl.LightningModule):
     def training_step(self, batch, batch_idx):
         """training step of DANN"""
         # Classification loss
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
-        bsz = src_inp_ids.size(0)
+        # source and target inputs are already concatenated by the collate function
+        inp_ids = batch["input_ids"]
+        attn_mask = batch["attention_mask"]
+        bsz = batch["split_point"]
 
         # get the labels
         labels = batch["label_source"]
 
-        start_steps = self.current_epoch * src_inp_ids.shape[0]
-        total_steps = self.hparams["epochs"] * src_inp_ids.shape[0]
+        start_steps = self.current_epoch * bsz
+        total_steps = self.hparams["epochs"] * bsz
 
         if self.is_dynamic_dann_alpha:
             p = float(batch_idx + start_steps) / total_steps
@@ -178,10 +169,8 @@ class DANN(pl.LightningModule):
             assert alpha is not None, f"Set dynamic_dann_alpha to True or pass dann_alpha"
 
         src_taskclf_logits, trg_taskclf_logits, src_domclf_logits, trg_domclf_logits = self(
-            src_inp_ids=src_inp_ids,
-            src_attn_mask=src_attn_mask,
-            trg_inp_ids=trg_inp_ids,
-            trg_attn_mask=trg_attn_mask,
+            inp_ids=inp_ids,
+            attn_mask=attn_mask,
             alpha=alpha,
         )
         # get the loss
@@ -224,18 +213,17 @@ class DANN(pl.LightningModule):
         """validation step of DANN"""
         # Source classification loss
         # Classification loss
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
-        bsz = src_inp_ids.size(0)
+        # source and target inputs are already concatenated by the collate function
+        inp_ids = batch["input_ids"]
+        attn_mask = batch["attention_mask"]
+        bsz = batch["split_point"]
 
         # get the labels
         src_labels = batch["label_source"]
         trg_labels = batch["label_target"]
 
-        start_steps = self.current_epoch * src_inp_ids.shape[0]
-        total_steps = self.hparams["epochs"] * src_inp_ids.shape[0]
+        start_steps = self.current_epoch * bsz
+        total_steps = self.hparams["epochs"] * bsz
 
         if self.is_dynamic_dann_alpha:
             p = float(batch_idx + start_steps) / total_steps
@@ -245,10 +233,8 @@ class DANN(pl.LightningModule):
             assert alpha is not None, f"Set dynamic_dann_alpha to True or pass dann_alpha"
 
         src_taskclf_logits, trg_taskclf_logits, src_domclf_logits, trg_domclf_logits = self(
-            src_inp_ids=src_inp_ids,
-            src_attn_mask=src_attn_mask,
-            trg_inp_ids=trg_inp_ids,
-            trg_attn_mask=trg_attn_mask,
+            inp_ids=inp_ids,
+            attn_mask=attn_mask,
             alpha=alpha,
         )
         # get the loss
@@ -320,18 +306,17 @@ class DANN(pl.LightningModule):
         """validation step of DANN"""
         # Source classification loss
         # Classification loss
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
-        bsz = src_inp_ids.size(0)
+        # source and target inputs are already concatenated by the collate function
+        inp_ids = batch["input_ids"]
+        attn_mask = batch["attention_mask"]
+        bsz = batch["split_point"]
 
         # get the labels
         src_labels = batch["label_source"]
         trg_labels = batch["label_target"]
 
-        start_steps = self.current_epoch * src_inp_ids.shape[0]
-        total_steps = self.hparams["epochs"] * src_inp_ids.shape[0]
+        start_steps = self.current_epoch * bsz
+        total_steps = self.hparams["epochs"] * bsz
 
         if self.is_dynamic_dann_alpha:
             p = float(batch_idx + start_steps) / total_steps
@@ -341,10 +326,8 @@ class DANN(pl.LightningModule):
             assert alpha is not None, f"Set dynamic_dann_alpha to True or pass dann_alpha"
 
         src_taskclf_logits, trg_taskclf_logits, src_domclf_logits, trg_domclf_logits = self(
-            src_inp_ids=src_inp_ids,
-            src_attn_mask=src_attn_mask,
-            trg_inp_ids=trg_inp_ids,
-            trg_attn_mask=trg_attn_mask,
+            inp_ids=inp_ids,
+            attn_mask=attn_mask,
             alpha=alpha,
         )
         # get the loss
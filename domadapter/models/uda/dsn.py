@@ -13,6 +13,7 @@ from collections import defaultdict
 from domadapter.models.modules.dsn_losses import DiffLoss, MSE
 from domadapter.divergences.cmd_divergence import CMD
 from domadapter.models.modules.linear_clf import LinearClassifier
+from domadapter.utils.tensor_utils import split_source_target
 
 import torchmetrics
 
@@ -199,10 +200,7 @@ class DSN(pl.LightningModule):
     def training_step(self, batch, batch_idx):
         """training step of DSN"""
         # Classification loss
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
@@ -272,10 +270,7 @@ class DSN(pl.LightningModule):
 
     def validation_step(self, batch, batch_idx):
         """validation step of DSN"""
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
@@ -330,10 +325,7 @@ class DSN(pl.LightningModule):
 
     def test_step(self, batch, batch_idx):
         """test step of DSN"""
-        src_inp_ids = batch["source_input_ids"]
-        src_attn_mask = batch["source_attention_mask"]
-        trg_inp_ids = batch["target_input_ids"]
-        trg_attn_mask = batch["target_attention_mask"]
+        src_inp_ids, src_attn_mask, trg_inp_ids, trg_attn_mask = split_source_target(batch)
         bsz = src_inp_ids.size(0)
 
         # get the labels
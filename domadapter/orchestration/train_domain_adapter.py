@@ -44,6 +44,24 @@ import wandb
 @click.option("--epochs", type=int, help="Number of epochs to run the training")
 @click.option("--gpu", type=int, default=None, help="GPU to run the program on")
 @click.option("--log-freq", type=int, help="Log wandb after how many steps")
+@click.option(
+    "--gradient-checkpointing/--no-gradient-checkpointing",
+    help="Recompute the transformer activations in the backward pass to save memory",
+    default=True,
+)
+@click.option(
+    "--compile/--no-compile",
+    "compile_model",
+    help="Compile the transformer forward (PyTorch >= 2.0) and the CMD divergence",
+    default=False,
+)
+@click.option(
+    "--precision",
+    type=click.Choice(["32", "16"]),
+    help="Floating point precision for training (16 enables native AMP)",
+    required=False,
+    default="32",
+)
 @click.option(
     "--gradient_clip_norm",
     type=float,
@@ -69,6 +87,9 @@ def train_domain_adapter(
     lr,
     epochs,
     gpu,
+    precision,
+    gradient_checkpointing,
+    compile_model,
     gradient_clip_norm,
 ):
     dataset_cache_dir = pathlib.Path(dataset_cache_dir)
@@ -93,6 +114,9 @@ def train_domain_adapter(
         "learning_rate": lr,
         "epochs": int(epochs),
         "gpu": gpu,
+        "precision": precision,
+        "gradient_checkpointing": gradient_checkpointing,
+        "compile": compile_model,
         "pretrained_model_name": str(pretrained_model_name),
         "max_seq_length": int(max_seq_length),
         "padding": str(padding),
@@ -150,6 +174,8 @@ def train_domain_adapter(
         log_every_n_steps=log_freq,
         gpus=str(gpu),
         max_epochs=epochs,
+        precision=int(precision),
+        amp_backend="native",
         logger=logger,
         gradient_clip_val=gradient_clip_norm,
     )
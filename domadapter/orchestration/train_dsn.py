@@ -21,7 +21,7 @@ import wandb
 @click.option(
     "--padding", type=str, help="Add padding while tokenizing upto max length"
 )
-@click.option("--max-seq-length", type=str, help="seq length for tokenizer")
+@click.option("--max-seq-length", type=int, help="seq length for tokenizer")
 @click.option(
     "--num-classes",
     type=int,
@@ -37,14 +37,21 @@ import wandb
 @click.option("--dev-proportion", type=float, help="Validate on small proportion")
 @click.option("--test-proportion", type=float, help="Test on small proportion")
 @click.option(
-    "--hidden-size", type=str, help="Hidden size of Linear Layer for downsampling"
+    "--hidden-size", type=int, help="Hidden size of Linear Layer for downsampling"
 )
 @click.option("--exp-dir", type=str, help="Experiment directory to store artefacts")
-@click.option("--seed", type=str, help="Seed for reproducibility")
+@click.option("--seed", type=int, help="Seed for reproducibility")
 @click.option("--lr", type=float, help="Learning rate for the entire model")
 @click.option("--epochs", type=int, help="Number of epochs to run the training")
 @click.option("--gpu", type=int, default=None, help="GPU to run the program on")
 @click.option("--log-freq", type=int, help="Log wandb after how many steps")
+@click.option(
+    "--precision",
+    type=click.Choice(["32", "16"]),
+    help="Floating point precision for training (16 enables native AMP)",
+    required=False,
+    default="32",
+)
 @click.option(
     "--diff-weight",
     type=float,
@@ -75,6 +82,7 @@ def train_dsn(
     lr,
     epochs,
     gpu,
+    precision,
     diff_weight,
     sim_weight,
     recon_weight,
@@ -94,20 +102,21 @@ def train_dsn(
         "dev_proportion": dev_proportion,
         "test_proportion": test_proportion,
         "source_target": source_target,
-        "num_classes": int(num_classes),
+        "num_classes": num_classes,
         "dataset_cache_dir": str(dataset_cache_dir),
         "exp_dir": str(exp_dir),
-        "hidden_size": int(hidden_size),
+        "hidden_size": hidden_size,
         "seed": seed,
         "learning_rate": lr,
-        "epochs": int(epochs),
+        "epochs": epochs,
         "gpu": gpu,
-        "pretrained_model_name": str(pretrained_model_name),
-        "max_seq_length": int(max_seq_length),
-        "padding": str(padding),
-        "diff_weight": float(diff_weight),
-        "sim_weight": float(sim_weight),
-        "recon_weight": float(recon_weight),
+        "precision": precision,
+        "pretrained_model_name": pretrained_model_name,
+        "max_seq_length": max_seq_length,
+        "padding": padding,
+        "diff_weight": diff_weight,
+        "sim_weight": sim_weight,
+        "recon_weight": recon_weight,
     }
 
     ###########################################################################
@@ -157,8 +166,11 @@ def train_dsn(
         callbacks=callbacks,
         terminate_on_nan=True,
         log_every_n_steps=log_freq,
-        gpus=str(gpu),
+        gpus=[gpu] if gpu is not None else None,
         max_epochs=epochs,
+        precision=int(precision),
+        amp_backend="native",
+        benchmark=True,
         logger=logger,
     )
 
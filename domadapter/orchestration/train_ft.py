@@ -21,7 +21,7 @@ import wandb
 @click.option(
     "--padding", type=str, help="Add padding while tokenizing upto max length"
 )
-@click.option("--max-seq-length", type=str, help="seq length for tokenizer")
+@click.option("--max-seq-length", type=int, help="seq length for tokenizer")
 @click.option("--bsz", type=int, help="batch size")
 @click.option("--train-proportion", type=float, help="Train on small proportion")
 @click.option("--test-proportion", type=float, help="Test on small proportion")
@@ -37,11 +37,18 @@ import wandb
     help="data module on which trained model is to be trained (MNLI/SA)",
 )
 @click.option("--exp-dir", type=str, help="Experiment directory to store artefacts")
-@click.option("--seed", type=str, help="Seed for reproducibility")
+@click.option("--seed", type=int, help="Seed for reproducibility")
 @click.option("--lr", type=float, help="Learning rate for the entire model")
 @click.option("--epochs", type=int, help="Number of epochs to run the training")
 @click.option("--gpu", type=int, default=None, help="GPU to run the program on")
 @click.option("--log-freq", type=int, help="Log wandb after how many steps")
+@click.option(
+    "--precision",
+    type=click.Choice(["32", "16"]),
+    help="Floating point precision for training (16 enables native AMP)",
+    required=False,
+    default="32",
+)
 @click.option(
     "--gradient_clip_norm",
     type=float,
@@ -67,6 +74,7 @@ def train_ft(
     lr,
     epochs,
     gpu,
+    precision,
     gradient_clip_norm,
 ):
     dataset_cache_dir = pathlib.Path(dataset_cache_dir)
@@ -83,17 +91,18 @@ def train_ft(
         "train_proportion": train_proportion,
         "dev_proportion": dev_proportion,
         "test_proportion": test_proportion,
-        "num_classes": int(num_classes),
+        "num_classes": num_classes,
         "source_target": source_target,
         "dataset_cache_dir": str(dataset_cache_dir),
         "exp_dir": str(exp_dir),
         "seed": seed,
         "learning_rate": lr,
-        "epochs": int(epochs),
+        "epochs": epochs,
         "gpu": gpu,
-        "pretrained_model_name": str(pretrained_model_name),
-        "max_seq_length": int(max_seq_length),
-        "padding": str(padding),
+        "precision": precision,
+        "pretrained_model_name": pretrained_model_name,
+        "max_seq_length": max_seq_length,
+        "padding": padding,
         "gradient_clip_norm": gradient_clip_norm,
     }
 
@@ -144,8 +153,11 @@ def train_ft(
         callbacks=callbacks,
         terminate_on_nan=True,
         log_every_n_steps=log_freq,
-        gpus=str(gpu),
+        gpus=[gpu] if gpu is not None else None,
         max_epochs=epochs,
+        precision=int(precision),
+        amp_backend="native",
+        benchmark=True,
         logger=logger,
         gradient_clip_val=gradient_clip_norm,
     )
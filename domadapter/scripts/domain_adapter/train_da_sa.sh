@@ -41,6 +41,7 @@ for src in "${SRC_DOMAINS[@]}"; do
                 --padding ${PADDING} \
                 --lr ${LR} \
                 --log-freq 5 \
+                --precision 16 \
                 --epochs ${EPOCHS} \
                 --bsz ${BSZ} \
                 --exp-dir ${EXP_DIR}
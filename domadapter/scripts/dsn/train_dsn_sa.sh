@@ -46,6 +46,7 @@ for src in "${SRC_DOMAINS[@]}"; do
                         --padding ${PADDING} \
                         --lr "${LR}" \
                         --log-freq 5 \
+                        --precision 16 \
                         --epochs ${EPOCHS} \
                         --bsz ${BSZ} \
                         --diff-weight ${DIFF_WEIGHT} \
@@ -36,6 +36,7 @@ for src in "${DOMAINS[@]}"; do
             --padding ${PADDING} \
             --lr ${LR} \
             --log-freq 5 \
+            --precision 16 \
             --epochs ${EPOCHS} \
             --bsz ${BSZ} \
             --exp-dir ${EXP_DIR}
@@ -1,17 +1,26 @@
 import argparse
+import hashlib
+import json
 import torch
 import numpy as np
-import pandas as pd
 from tqdm import tqdm
-import glob
-import gc
 import os
+from functools import partial
 
 from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
+
+# use the GPU implementation of TSNE from RAPIDS cuML if it is installed
+try:
+    from cuml.manifold import TSNE
+    TSNE_KWARGS = {}
+except ImportError:
+    from sklearn.manifold import TSNE
+    TSNE_KWARGS = {"n_jobs": -1}
 
 import plotly.express as px
 
+from torch.utils.data import DataLoader
+
 from transformers import AutoTokenizer
 from transformers import AutoModelWithHeads, AutoConfig
 
@@ -19,7 +28,7 @@ from datasets import load_dataset
 
 # global variables
 MAX_SEQ_LENGTH = 128
-BATCH_SIZE = 8
+BATCH_SIZE = 64
 
 parser = argparse.ArgumentParser(description='Process some integers.')
 parser.add_argument('--adapter', type=str,
@@ -30,6 +39,8 @@ parser.add_argument('--target', type=str,
                     help='target CSV file whose representations are to be plotted')
 parser.add_argument('--reduction', type=str,
                     help='PCA or TSNE')
+parser.add_argument('--overwrite-cache', action='store_true',
+                    help='recompute the representations even if they are cached')
 
 args = parser.parse_args()
 
@@ -53,22 +64,55 @@ if torch.cuda.is_available():
 else:
     device = torch.device("cpu")
 
-# load model and tokenizer
-config = AutoConfig.from_pretrained("bert-base-uncased", output_hidden_states=True)
-model = AutoModelWithHeads.from_pretrained("bert-base-uncased", config=config)
+# load config and tokenizer
+# only the CLS token of every layer is needed, which is captured by forward hooks
+config = AutoConfig.from_pretrained("bert-base-uncased", output_hidden_states=False)
 tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
 
-# load adapter checkpoints and activate it
-adapter_name = model.load_adapter(args.adapter)
-# model.train_adapter([adapter_name])
+# the model is only loaded if some representations are not cached
+model = None
+# CLS token of every layer for the current batch, filled by the forward hooks
+# shape [num_layers, BATCH_SIZE, hidden_size]
+cls_buffer = None
+
+# name of the adapter saved in the checkpoint
+with open(os.path.join(args.adapter, "adapter_config.json")) as fp:
+    adapter_name = json.load(fp)["name"]
 
 
 output_dir = "pretrained"+adapter_name.split("domain_adapter")[-1]
 if not os.path.exists(output_dir):
     os.makedirs(output_dir)
 
-# put model on device
-model.to(device)
+# fingerprint of the adapter weights, so a retrained checkpoint with the same name
+# does not reuse stale cached representations
+with open(os.path.join(args.adapter, "pytorch_adapter.bin"), "rb") as fp:
+    adapter_digest = hashlib.md5(fp.read()).hexdigest()[:12]
+
+
+def save_cls_token(layer, module, inputs, output):
+    # output[0] shape [batch_size, seq_length, hidden_size]
+    cls_buffer[layer, :output[0].shape[0]].copy_(output[0][:, 0, :])
+
+
+def load_model():
+    global model, cls_buffer
+    if model is None:
+        model = AutoModelWithHeads.from_pretrained("bert-base-uncased", config=config)
+        # load adapter checkpoints and activate it
+        model.load_adapter(args.adapter)
+        # model.train_adapter([adapter_name])
+
+        # put model on device, only embeddings are extracted so run it in half precision on GPU
+        model.to(device)
+        model.eval()
+        if device.type == "cuda":
+            model.half()
+
+        cls_buffer = torch.empty((config.num_hidden_layers, BATCH_SIZE, config.hidden_size), dtype=model.dtype, device=device)
+        for layer, module in enumerate(model.base_model.encoder.layer):
+            module.register_forward_hook(partial(save_cls_token, layer))
+    return model
 
 # load csv source dataset
 source_dataset = load_dataset("csv", data_files=[args.source])["train"]
@@ -76,90 +120,77 @@ source_dataset = load_dataset("csv", data_files=[args.source])["train"]
 # load csv target dataset
 target_dataset = load_dataset("csv", data_files=[args.target])["train"]
 
-# function to create temp directory to store representations
-def prepare_dir():
-    temp_dir = "temp"
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-    else:
-        # clear directory
-        files = glob.glob('./temp/*')
-        for f in files:
-            os.remove(f)
-
-
-def save_representations(dataset, name):
-    prepare_dir()
-    count = 0
-    batch_text = []
-    dictionary_list = []
-
-    for i in tqdm(range(len(dataset))):
-        # if(i<=500):
-            if i % BATCH_SIZE == 0:  #batch size can be increased depending on your RAM
-                batch_text.append((dataset["premise"][i], dataset["hypothesis"][i]))
-                # batch_text.append(dataset["sentence"][i])
-
-                encoding = tokenizer(batch_text, return_tensors='pt', padding='max_length', truncation=True, max_length=MAX_SEQ_LENGTH)
-                input_ids = encoding['input_ids'].to(device)
-                attention_mask = encoding['attention_mask'].to(device)
-                outputs = model(input_ids, attention_mask)
-                hidden_states = outputs["hidden_states"][1:]
-
-                batch_text = []
-                for example in range(len(hidden_states[0])):
-                    for layer in range(0,12):
-                        new_row = {'embeddings':hidden_states[layer][example][0].cpu().detach().numpy(), 'layers': layer+1}
-                        dictionary_list.append(new_row)
-
-                dictionary_list = np.save(f"./temp/batch_{count}", dictionary_list, allow_pickle=True)
-                dictionary_list = []
-                gc.collect()
-                count += 1
-
-            else:
-                batch_text.append((dataset["premise"][i], dataset["hypothesis"][i]))
-                # batch_text.append(dataset["sentence"][i])
-
-    embeddings_list = []
-    files = glob.glob("./temp/*.npy")
-
-    for j in range(len(files)):
-        alpha = np.load(f"./temp/batch_{j}.npy", allow_pickle = True)
-        for i in range(len(alpha)):
-            new_row = {'embeddings':alpha[i]["embeddings"], 'layers': alpha[i]["layers"], 'label': f"{name}"}
-            embeddings_list.append(new_row)
-
-    df = pd.DataFrame.from_dict(embeddings_list)
-    return df
+# columns passed to tokenize, only these are read from the arrow table
+TEXT_COLUMNS = ["premise", "hypothesis"]
+# TEXT_COLUMNS = ["sentence"]
+
+
+def tokenize(*texts):
+    return tokenizer(*texts, padding='max_length', truncation=True, max_length=MAX_SEQ_LENGTH)
+
+
+def save_representations(dataset, name, data_file):
+    # representations are cached per adapter checkpoint, max sequence length and CSV file
+    data_name = os.path.splitext(os.path.basename(data_file))[0]
+    cache_file = os.path.join(output_dir, f"embeddings_{name}_{data_name}_{MAX_SEQ_LENGTH}_{adapter_digest}.npy")
+    if os.path.exists(cache_file) and not args.overwrite_cache:
+        return np.load(cache_file)
+
+    model = load_model()
+    num_layers = config.num_hidden_layers
+    # CLS representation of every example for every layer
+    # layer major so that the examples of a layer are contiguous
+    embeddings = np.empty((num_layers, len(dataset), config.hidden_size), dtype=np.float32)
+    offset = 0
+
+    # tokenize the whole dataset in batches (and processes) instead of example by example
+    encoded_dataset = dataset.map(tokenize, batched=True, batch_size=256, num_proc=os.cpu_count(), input_columns=TEXT_COLUMNS, remove_columns=dataset.column_names)
+    encoded_dataset.set_format(type="torch", columns=["input_ids", "attention_mask"])
+    loader = DataLoader(encoded_dataset, batch_size=BATCH_SIZE, pin_memory=True, num_workers=4)  #batch size can be increased depending on your RAM
+
+    with torch.inference_mode():
+        for batch in tqdm(loader):
+            # the loader pins the batches, so the copies to the GPU can be asynchronous
+            input_ids = batch['input_ids'].to(device, non_blocking=True)
+            attention_mask = batch['attention_mask'].to(device, non_blocking=True)
+            model(input_ids, attention_mask)
+
+            # CLS token of every layer, shape [num_layers, batch_size, hidden_size]
+            # moved to the CPU with a single copy
+            batch_size = input_ids.shape[0]
+            cls_tokens = cls_buffer[:, :batch_size]
+            embeddings[:, offset:offset+batch_size] = cls_tokens.float().cpu().numpy()
+            offset += batch_size
+
+    np.save(cache_file, embeddings)
+    return embeddings
 
 
 print("creating and saving representations for source")
-source_df = save_representations(source_dataset, source)
+source_embeddings = save_representations(source_dataset, source, args.source)
 
 print("creating and saving representations for target")
-target_df = save_representations(target_dataset, target)
+target_embeddings = save_representations(target_dataset, target, args.target)
 
-# concatenate source and target dataframes and change indexing
-df = pd.concat([source_df, target_df])
-df.reset_index(drop=True, inplace=True)
+# concatenate source and target representations along the examples
+embeddings = np.concatenate([source_embeddings, target_embeddings], axis=1)
+labels = np.array([source] * source_embeddings.shape[1] + [target] * target_embeddings.shape[1])
 
-# filter dataframe by layers and create plots
-for i in tqdm(range(1,13), desc="creating plots"):
-    new_df = df[df['layers'] == i]
-    new_df.reset_index(drop=True, inplace=True)
-    mat = np.matrix([x for x in new_df.embeddings])
+# create plots for every layer
+for i in tqdm(range(1,embeddings.shape[0]+1), desc="creating plots"):
+    # contiguous float32 matrix of shape [num_examples, hidden_size]
+    mat = embeddings[i-1]
 
     if args.reduction == "PCA":
-        pca = PCA(n_components=2, random_state=42)
+        pca = PCA(n_components=2, svd_solver='randomized', random_state=42)
         components = pca.fit_transform(mat)
 
     else:
-        tsne = TSNE(n_components=2, random_state=42, n_jobs=-1)
+        tsne = TSNE(n_components=2, method='barnes_hut', random_state=42, **TSNE_KWARGS)
         components = tsne.fit_transform(mat)
 
     fig = px.scatter(
-        components, x=0, y=1, color=new_df['label'],
+        components, x=0, y=1, color=labels,
         labels={'color': 'label'}
     )
     fig.update_xaxes(visible=True, showticklabels=False, showgrid=False)
@@ -1,4 +1,4 @@
-from typing import ForwardRef
+from typing import ForwardRef, Any, Callable, Dict, List, Tuple
 import torch
 
 
@@ -34,3 +34,80 @@ def pairwise_distance(x: torch.Tensor, y: torch.Tensor):
     # N, M
     output = torch.sum(output, 1)
     return output
+
+
+def source_target_collate(batch: List[Dict[str, torch.Tensor]]) -> Dict[str, Any]:
+    """Collates source and target examples into a single concatenated batch
+
+    The source examples occupy the first half of ``input_ids``/``attention_mask``
+    and the target examples the second half, so that models which pass both
+    domains through the encoder together do not have to ``torch.cat`` them on
+    every step. ``split_point`` is the index where the target examples start,
+    use ``split_source_target`` to get the two halves.
+
+    :param batch: List[Dict[str, torch.Tensor]]
+        Examples returned by a ``SourceTargetDataset``
+    :return: Dict[str, Any]
+        The collated batch
+    """
+    bsz = len(batch)
+    input_ids = torch.stack(
+        [example["source_input_ids"] for example in batch]
+        + [example["target_input_ids"] for example in batch],
+        dim=0,
+    )
+    attention_mask = torch.stack(
+        [example["source_attention_mask"] for example in batch]
+        + [example["target_attention_mask"] for example in batch],
+        dim=0,
+    )
+
+    collated = {
+        "input_ids": input_ids,
+        "attention_mask": attention_mask,
+        "split_point": bsz,
+        "label_source": torch.stack([example["label_source"] for example in batch]),
+    }
+    if "label_target" in batch[0]:
+        collated["label_target"] = torch.stack(
+            [example["label_target"] for example in batch]
+        )
+
+    return collated
+
+
+def split_source_target(
+    batch: Dict[str, Any]
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Splits a batch collated by ``source_target_collate`` into source and target inputs
+
+    The returned tensors are views of the concatenated batch, no copy is made.
+
+    :param batch: Dict[str, Any]
+        The collated batch
+    :return: Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]
+        source_input_ids, source_attention_mask, target_input_ids, target_attention_mask
+    """
+    split_point = batch["split_point"]
+    return (
+        batch["input_ids"][:split_point],
+        batch["attention_mask"][:split_point],
+        batch["input_ids"][split_point:],
+        batch["attention_mask"][split_point:],
+    )
+
+
+def jit_compile(fn: Callable) -> Callable:
+    """JIT compiles a function made of tensor operations
+
+    Uses ``torch.compile`` (PyTorch >= 2.0) which fuses the operations into
+    fewer kernels and falls back to ``torch.jit.script`` on older versions.
+
+    :param fn: Callable
+        The function to compile
+    :return: Callable
+        The compiled function
+    """
+    if hasattr(torch, "compile"):
+        return torch.compile(fn)
+    return torch.jit.script(fn)
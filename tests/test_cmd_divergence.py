@@ -0,0 +1,42 @@
+import pytest
+import torch
+from domadapter.divergences.cmd_divergence import CMD, cmd
+from domadapter.utils.tensor_utils import jit_compile
+
+
+@pytest.fixture
+def samples():
+    torch.manual_seed(1729)
+    # num_layers, batch_size, embedding_dimension
+    source = torch.randn(4, 8, 16)
+    target = torch.randn(4, 8, 16) + 0.5
+    return source, target
+
+
+class TestCMD:
+    def test_compiled_cmd_2d(self, samples):
+        source, target = samples
+        compiled_cmd = jit_compile(cmd)
+        assert torch.allclose(compiled_cmd(source[0], target[0]), cmd(source[0], target[0]))
+
+    def test_compiled_cmd_3d(self, samples):
+        source, target = samples
+        compiled_cmd = jit_compile(cmd)
+        assert torch.allclose(compiled_cmd(source, target), cmd(source, target))
+
+    def test_layerwise_matches_per_layer(self, samples):
+        source, target = samples
+        criterion = CMD()
+        per_layer = torch.stack(
+            [criterion.calculate(src, trg) for src, trg in zip(source, target)]
+        )
+        assert torch.allclose(criterion.calculate_layerwise(source, target), per_layer)
+
+    def test_compile_is_lazy(self, samples):
+        source, target = samples
+        criterion = CMD(compile_cmd=True)
+        assert criterion._compiled_cmd is None
+
+        divergence = criterion.calculate(source[0], target[0])
+        assert torch.allclose(divergence, CMD().calculate(source[0], target[0]))
+        assert criterion._compiled_cmd is not None
@@ -0,0 +1,56 @@
+import pytest
+import torch
+from domadapter.divergences.cmd_divergence import CMD
+from domadapter.utils.tensor_utils import source_target_collate, split_source_target
+
+
+def make_examples(num_examples, seq_length, with_label_target):
+    # mirrors the dictionaries returned by SourceTargetDataset
+    torch.manual_seed(1729)
+    examples = []
+    for _ in range(num_examples):
+        example = {
+            "source_input_ids": torch.randint(0, 30522, (seq_length,), dtype=torch.int32),
+            "source_attention_mask": torch.randint(0, 2, (seq_length,)),
+            "target_input_ids": torch.randint(0, 30522, (seq_length,), dtype=torch.int32),
+            "target_attention_mask": torch.randint(0, 2, (seq_length,)),
+            "label_source": torch.tensor(1, dtype=torch.long),
+        }
+        if with_label_target:
+            example["label_target"] = torch.tensor(2, dtype=torch.long)
+        examples.append(example)
+    return examples
+
+
+@pytest.mark.parametrize("with_label_target", [True, False])
+def test_collate_split_round_trip(with_label_target):
+    examples = make_examples(4, 7, with_label_target)
+    batch = source_target_collate(examples)
+
+    assert batch["split_point"] == 4
+    assert batch["input_ids"].shape == (8, 7)
+    assert batch["input_ids"].dtype == torch.int32
+    assert ("label_target" in batch) == with_label_target
+
+    source_input_ids, source_attention_mask, target_input_ids, target_attention_mask = split_source_target(batch)
+    assert torch.equal(source_input_ids, torch.stack([example["source_input_ids"] for example in examples]))
+    assert torch.equal(source_attention_mask, torch.stack([example["source_attention_mask"] for example in examples]))
+    assert torch.equal(target_input_ids, torch.stack([example["target_input_ids"] for example in examples]))
+    assert torch.equal(target_attention_mask, torch.stack([example["target_attention_mask"] for example in examples]))
+    assert torch.equal(batch["label_source"], torch.stack([example["label_source"] for example in examples]))
+    if with_label_target:
+        assert torch.equal(batch["label_target"], torch.stack([example["label_target"] for example in examples]))
+
+
+def test_calculate_hidden_states_matches_loop():
+    torch.manual_seed(1729)
+    # num_layers * [2 * batch_size, seq_length, hidden_dim]
+    hidden_states = [torch.randn(8, 5, 16) for _ in range(3)]
+    criterion = CMD()
+
+    expected = 0
+    for hidden_state in hidden_states:
+        pooled = torch.mean(hidden_state, dim=1)
+        expected += criterion.calculate(pooled[:4], pooled[4:])
+
+    assert torch.allclose(criterion.calculate_hidden_states(hidden_states, 4), expected)